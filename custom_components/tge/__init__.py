@@ -2,16 +2,21 @@ import logging
 
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from .const import (
-    DOMAIN, PLATFORMS
+    DOMAIN
 )
 from .update_coordinator import TgeUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+PLATFORMS = [
+    Platform.SENSOR
+]
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {}
 )
@@ -25,12 +30,13 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})
 
-    coordinator = TgeUpdateCoordinator(hass)
+    coordinator = TgeUpdateCoordinator(hass, config_entry)
     await coordinator.async_refresh()
 
     if not coordinator.last_update_success:
         raise ConfigEntryNotReady
 
+    coordinator.async_start_listeners()
     hass.data[DOMAIN][config_entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
@@ -42,7 +48,8 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     """Unload a config entry."""
     unloaded = await hass.config_entries.async_unload_platforms(config_entry, PLATFORMS)
     if unloaded:
-        hass.data[DOMAIN].pop(config_entry.entry_id)
+        coordinator: TgeUpdateCoordinator = hass.data[DOMAIN].pop(config_entry.entry_id)
+        coordinator.async_stop_listeners()
     return unloaded
 
 
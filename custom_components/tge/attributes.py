@@ -0,0 +1,37 @@
+"""State attributes of TGE sensors."""
+
+from __future__ import annotations
+
+import datetime
+from typing import Any, Callable
+
+from .connector import TgeHourData
+from .const import ATTRIBUTE_PRICES, ATTRIBUTE_VOLUMES, ATTRIBUTE_TODAY_SUFFIX, ATTRIBUTE_TOMORROW_SUFFIX, \
+    UNIT_GR_KWH, UNIT_ZL_KWH
+
+# Hourly series are large and change with every new day of data, so they are kept out of the recorder.
+UNRECORDED_ATTRIBUTES = frozenset({
+    f"{name}{suffix}"
+    for name in [ATTRIBUTE_PRICES, ATTRIBUTE_VOLUMES]
+    for suffix in ["", ATTRIBUTE_TODAY_SUFFIX, ATTRIBUTE_TOMORROW_SUFFIX]
+})
+
+
+def get_series_attributes(hours: list[TgeHourData], attribute_name: str, parameter_name: str,
+                          get_value: Callable[[TgeHourData], float], today: datetime.date) -> dict[str, Any]:
+    values = list(map(lambda d: {"time": d.time, parameter_name: get_value(d)}, hours))
+    tomorrow = today + datetime.timedelta(days=1)
+    return {
+        f"{attribute_name}{ATTRIBUTE_TODAY_SUFFIX}": list(filter(lambda d: d["time"].date() == today, values)),
+        f"{attribute_name}{ATTRIBUTE_TOMORROW_SUFFIX}": list(filter(lambda d: d["time"].date() == tomorrow, values)),
+        attribute_name: values,
+    }
+
+
+def convert_price(value: float, unit: str) -> float:
+    """Convert a price in zł/MWh to the given unit."""
+    if unit == UNIT_GR_KWH:
+        return round(value / 10, 3)
+    elif unit == UNIT_ZL_KWH:
+        return round(value / 1000, 5)
+    return value
@@ -0,0 +1,275 @@
+"""Command-line export of TGE fixing history."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime
+import importlib.machinery
+import importlib.util
+import json
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, TextIO
+
+import requests
+
+if not __package__:
+    # Executed as a script: load sibling modules as a package without running its __init__, which needs Home Assistant.
+    _package = importlib.util.module_from_spec(importlib.machinery.ModuleSpec("tge_cli", None, is_package=True))
+    _package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules.setdefault("tge_cli", _package)
+    __package__ = "tge_cli"
+
+from .connector import TgeConnector, TgeDayData, TgeException  # noqa: E402
+
+_LOGGER = logging.getLogger(__name__)
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+FORMATS = [FORMAT_CSV, FORMAT_JSONL, FORMAT_PARQUET]
+EXTENSIONS = {
+    ".csv": FORMAT_CSV,
+    ".jsonl": FORMAT_JSONL,
+    ".ndjson": FORMAT_JSONL,
+    ".parquet": FORMAT_PARQUET,
+}
+FIELDS = ["time", "fixing1_rate", "fixing1_volume", "fixing2_rate", "fixing2_volume"]
+DEFAULT_CONCURRENCY = 4
+PARQUET_ROW_GROUP_SIZE = 100_000
+PROGRESS_SUFFIX = ".progress"
+
+
+class TgeExportWriter(ABC):
+    resumable: bool = True
+
+    @abstractmethod
+    def write_day(self, day_data: TgeDayData) -> None:
+        """Write and flush rows of a single day."""
+
+    @abstractmethod
+    def size(self) -> int:
+        """Return number of bytes of the output file written so far."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flush buffered rows and close the output file."""
+
+
+class TgeCsvWriter(TgeExportWriter):
+
+    def __init__(self, path: str, append: bool) -> None:
+        write_header = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file: TextIO = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        if write_header:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write_day(self, day_data: TgeDayData) -> None:
+        self._writer.writerows(h.to_dict() for h in day_data.hours)
+        self._file.flush()
+
+    def size(self) -> int:
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class TgeJsonLinesWriter(TgeExportWriter):
+
+    def __init__(self, path: str, append: bool) -> None:
+        self._file: TextIO = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write_day(self, day_data: TgeDayData) -> None:
+        self._file.writelines(json.dumps(h.to_dict()) + "\n" for h in day_data.hours)
+        self._file.flush()
+
+    def size(self) -> int:
+        return os.fstat(self._file.fileno()).st_size
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class TgeParquetWriter(TgeExportWriter):
+    resumable = False
+
+    def __init__(self, path: str, append: bool) -> None:
+        if append:
+            raise TgeException("Resuming is not supported for parquet format")
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise TgeException("Parquet export requires pyarrow to be installed") from e
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([
+            ("time", pyarrow.timestamp("s", tz="UTC")),
+            ("fixing1_rate", pyarrow.float64()),
+            ("fixing1_volume", pyarrow.float64()),
+            ("fixing2_rate", pyarrow.float64()),
+            ("fixing2_volume", pyarrow.float64()),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        self._columns: dict[str, list] = {name: [] for name in FIELDS}
+
+    def write_day(self, day_data: TgeDayData) -> None:
+        for h in day_data.hours:
+            self._columns["time"].append(h.time)
+            self._columns["fixing1_rate"].append(h.fixing1_rate)
+            self._columns["fixing1_volume"].append(h.fixing1_volume)
+            self._columns["fixing2_rate"].append(h.fixing2_rate)
+            self._columns["fixing2_volume"].append(h.fixing2_volume)
+        if len(self._columns["time"]) >= PARQUET_ROW_GROUP_SIZE:
+            self._write_row_group()
+
+    def size(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        self._write_row_group()
+        self._writer.close()
+
+    def _write_row_group(self) -> None:
+        if len(self._columns["time"]) == 0:
+            return
+        self._writer.write_table(self._pyarrow.table(self._columns, schema=self._schema))
+        self._columns = {name: [] for name in FIELDS}
+
+
+WRITERS: dict[str, type[TgeExportWriter]] = {
+    FORMAT_CSV: TgeCsvWriter,
+    FORMAT_JSONL: TgeJsonLinesWriter,
+    FORMAT_PARQUET: TgeParquetWriter,
+}
+
+
+def date_range(start: datetime.date, end: datetime.date) -> Iterator[datetime.date]:
+    date = start
+    while date <= end:
+        yield date
+        date += datetime.timedelta(days=1)
+
+
+def fetch_days(dates: Iterator[datetime.date], concurrency: int) -> Iterator[
+        tuple[datetime.date, TgeDayData | None]]:
+    # At most `concurrency` pages are in flight or buffered; results are yielded in date order.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        for date in dates:
+            pending.append((date, executor.submit(TgeConnector.get_data_for_date, date)))
+            if len(pending) >= concurrency:
+                date_done, future = pending.popleft()
+                yield date_done, future.result()
+        while len(pending) > 0:
+            date_done, future = pending.popleft()
+            yield date_done, future.result()
+
+
+def read_progress(path: str) -> tuple[datetime.date, int | None] | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        value = file.read().split()
+    if len(value) == 0:
+        return None
+    return datetime.date.fromisoformat(value[0]), int(value[1]) if len(value) > 1 else None
+
+
+def write_progress(path: str, date: datetime.date, size: int) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(f"{date.isoformat()} {size}")
+    os.replace(tmp_path, path)
+
+
+def export(start: datetime.date, end: datetime.date, output: str, output_format: str,
+           concurrency: int = DEFAULT_CONCURRENCY, resume: bool = False) -> int:
+    progress_path = output + PROGRESS_SUFFIX
+    progress = read_progress(progress_path) if resume else None
+    if progress is not None:
+        last_date, size = progress
+        start = max(start, last_date + datetime.timedelta(days=1))
+        if size is not None and os.path.exists(output) and os.path.getsize(output) > size:
+            # Rows written after the last saved progress belong to a day that will be downloaded again.
+            _LOGGER.info("Truncating %s to %d bytes", output, size)
+            os.truncate(output, size)
+        _LOGGER.info("Resuming export from %s", start)
+    if start > end:
+        _LOGGER.info("Nothing to export")
+        return 0
+    writer = WRITERS[output_format](output, progress is not None)
+    rows = 0
+    try:
+        for date, day_data in fetch_days(date_range(start, end), concurrency):
+            if day_data is None:
+                _LOGGER.warning("No TGE data for date %s", date)
+            else:
+                writer.write_day(day_data)
+                rows += len(day_data.hours)
+            if writer.resumable:
+                write_progress(progress_path, date, writer.size())
+    finally:
+        writer.close()
+    return rows
+
+
+def _parse_date(value: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Invalid date: {value}") from e
+
+
+def _parse_args(args: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export TGE fixing history to CSV, JSON Lines or Parquet.")
+    parser.add_argument("start", type=_parse_date, help="first date to export (YYYY-MM-DD)")
+    parser.add_argument("end", type=_parse_date, nargs="?", default=datetime.date.today(),
+                        help="last date to export (YYYY-MM-DD), defaults to today")
+    parser.add_argument("-o", "--output", required=True, help="output file")
+    parser.add_argument("-f", "--format", choices=FORMATS, dest="output_format",
+                        help="output format, detected from output file extension by default")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"number of pages downloaded concurrently (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("-r", "--resume", action="store_true",
+                        help="continue an interrupted export of the same output file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="enable debug logging")
+    parsed = parser.parse_args(args)
+    if parsed.output_format is None:
+        parsed.output_format = EXTENSIONS.get(os.path.splitext(parsed.output)[1].lower())
+        if parsed.output_format is None:
+            parser.error("unable to detect output format, use --format")
+    if parsed.resume and not WRITERS[parsed.output_format].resumable:
+        parser.error(f"resuming is not supported for {parsed.output_format} format")
+    if parsed.concurrency < 1:
+        parser.error("concurrency has to be at least 1")
+    if parsed.start > parsed.end:
+        parser.error("start date has to be before end date")
+    return parsed
+
+
+def main(args: list[str] | None = None) -> int:
+    parsed = _parse_args(args)
+    logging.basicConfig(level=logging.DEBUG if parsed.verbose else logging.INFO)
+    try:
+        rows = export(parsed.start, parsed.end, parsed.output, parsed.output_format, parsed.concurrency,
+                      parsed.resume)
+    except TgeException as e:
+        _LOGGER.error("Export failed: %s", e.msg)
+        return 1
+    except requests.RequestException as e:
+        _LOGGER.error("Export failed: %s", e)
+        return 1
+    _LOGGER.info("Exported %d rows to %s", rows, parsed.output)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -13,7 +13,9 @@ from homeassistant.helpers.template import Template
 from .const import DOMAIN, CONF_UNIT, UNIT_ZL_MWH, UNIT_GR_KWH, UNIT_ZL_KWH, CONF_STATE_TEMPLATE_FIXING_1_RATE, \
     CONF_STATE_TEMPLATE_FIXING_2_RATE, CONF_STATE_TEMPLATE_FIXING_1_VOLUME, CONF_STATE_TEMPLATE_FIXING_2_VOLUME, \
     PARAMETER_FIXING_1_RATE, PARAMETER_FIXING_1_VOLUME, PARAMETER_FIXING_2_RATE, PARAMETER_FIXING_2_VOLUME, \
-    CONF_USE_STATE_TEMPLATES
+    CONF_USE_STATE_TEMPLATES, CONF_ENERGY_SENSOR, CONF_BATTERY_CAPACITY, CONF_BATTERY_CHARGE_POWER, \
+    CONF_BATTERY_DISCHARGE_POWER, CONF_BATTERY_EFFICIENCY, CONF_BATTERY_INITIAL_SOC, CONF_BATTERY_SOC_SENSOR, \
+    DEFAULT_BATTERY_CAPACITY, DEFAULT_BATTERY_POWER, DEFAULT_BATTERY_EFFICIENCY, DEFAULT_BATTERY_INITIAL_SOC
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,9 +93,7 @@ class TgeOptionsFlowHandler(config_entries.OptionsFlow):
                     self.options[CONF_STATE_TEMPLATE_FIXING_2_RATE] = ""
                     self.options[CONF_STATE_TEMPLATE_FIXING_1_VOLUME] = ""
                     self.options[CONF_STATE_TEMPLATE_FIXING_2_VOLUME] = ""
-                output = await self._update_options()
-                await self.hass.config_entries.async_reload(self.config_entry.entry_id)
-                return output
+                return await self.async_step_cost()
 
             return self.async_show_form(
                 step_id="templates",
@@ -135,6 +135,59 @@ class TgeOptionsFlowHandler(config_entries.OptionsFlow):
             })
         )
 
+    async def async_step_cost(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        if user_input is not None:
+            self.options[CONF_ENERGY_SENSOR] = user_input.get(CONF_ENERGY_SENSOR, "")
+            return await self.async_step_battery()
+
+        return self.async_show_form(
+            step_id="cost",
+            data_schema=vol.Schema({
+                vol.Optional(CONF_ENERGY_SENSOR,
+                             description={"suggested_value": self.options.get(CONF_ENERGY_SENSOR, "")}): selector(
+                    {"entity": {"domain": "sensor", "device_class": "energy"}}),
+            })
+        )
+
+    async def async_step_battery(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        if user_input is not None:
+            self.options[CONF_BATTERY_CAPACITY] = user_input.get(CONF_BATTERY_CAPACITY, DEFAULT_BATTERY_CAPACITY)
+            self.options[CONF_BATTERY_CHARGE_POWER] = user_input.get(CONF_BATTERY_CHARGE_POWER, DEFAULT_BATTERY_POWER)
+            self.options[CONF_BATTERY_DISCHARGE_POWER] = user_input.get(CONF_BATTERY_DISCHARGE_POWER,
+                                                                        DEFAULT_BATTERY_POWER)
+            self.options[CONF_BATTERY_EFFICIENCY] = user_input.get(CONF_BATTERY_EFFICIENCY,
+                                                                   DEFAULT_BATTERY_EFFICIENCY)
+            self.options[CONF_BATTERY_INITIAL_SOC] = user_input.get(CONF_BATTERY_INITIAL_SOC,
+                                                                    DEFAULT_BATTERY_INITIAL_SOC)
+            self.options[CONF_BATTERY_SOC_SENSOR] = user_input.get(CONF_BATTERY_SOC_SENSOR, "")
+            output = await self._update_options()
+            await self.hass.config_entries.async_reload(self.config_entry.entry_id)
+            return output
+
+        return self.async_show_form(
+            step_id="battery",
+            data_schema=vol.Schema({
+                vol.Required(CONF_BATTERY_CAPACITY,
+                             default=self.options.get(CONF_BATTERY_CAPACITY, DEFAULT_BATTERY_CAPACITY)): selector(
+                    {"number": {"min": 0, "max": 1000, "step": 0.1, "unit_of_measurement": "kWh", "mode": "box"}}),
+                vol.Required(CONF_BATTERY_CHARGE_POWER,
+                             default=self.options.get(CONF_BATTERY_CHARGE_POWER, DEFAULT_BATTERY_POWER)): selector(
+                    {"number": {"min": 0, "max": 1000, "step": 0.1, "unit_of_measurement": "kW", "mode": "box"}}),
+                vol.Required(CONF_BATTERY_DISCHARGE_POWER,
+                             default=self.options.get(CONF_BATTERY_DISCHARGE_POWER, DEFAULT_BATTERY_POWER)): selector(
+                    {"number": {"min": 0, "max": 1000, "step": 0.1, "unit_of_measurement": "kW", "mode": "box"}}),
+                vol.Required(CONF_BATTERY_EFFICIENCY,
+                             default=self.options.get(CONF_BATTERY_EFFICIENCY, DEFAULT_BATTERY_EFFICIENCY)): selector(
+                    {"number": {"min": 1, "max": 100, "step": 1, "unit_of_measurement": "%"}}),
+                vol.Required(CONF_BATTERY_INITIAL_SOC,
+                             default=self.options.get(CONF_BATTERY_INITIAL_SOC, DEFAULT_BATTERY_INITIAL_SOC)): selector(
+                    {"number": {"min": 0, "max": 100, "step": 1, "unit_of_measurement": "%"}}),
+                vol.Optional(CONF_BATTERY_SOC_SENSOR,
+                             description={"suggested_value": self.options.get(CONF_BATTERY_SOC_SENSOR, "")}): selector(
+                    {"entity": {"domain": "sensor", "device_class": "battery"}}),
+            })
+        )
+
     def _validate_template(self, template: str) -> bool:
         if template == "":
             return True
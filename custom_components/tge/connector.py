@@ -2,16 +2,20 @@
 
 from __future__ import annotations
 
+import codecs
 import datetime
 import logging
 import re
+import time
 from dataclasses import dataclass
+from html.parser import HTMLParser
 from typing import Any
+from zoneinfo import ZoneInfo
 
 import requests
 from bs4 import BeautifulSoup, Tag
 
-from .const import DATA_URL_TEMPLATE
+from .const import DATA_URL_TEMPLATE, CHUNK_SIZE, TIMETABLE_ID, TIMEZONE, REQUEST_TIMEOUT
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -71,6 +75,54 @@ class TgeException(Exception):
     msg: str
 
 
+class TgeStreamScanner(HTMLParser):
+    """Detects when both the date header and the hourly table have been received."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.date_found = False
+        self.table_complete = False
+        self._table_depth = 0
+        self._date_tag: str | None = None
+        self._date_tag_depth = 0
+        self._date_text: list[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.date_found and self.table_complete
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "table" and not self.table_complete:
+            if self._table_depth > 0:
+                self._table_depth += 1
+            elif dict(attrs).get("id") == TIMETABLE_ID:
+                self._table_depth = 1
+        if self._date_tag is not None:
+            if tag == self._date_tag:
+                self._date_tag_depth += 1
+        elif "kontrakt-date" in (dict(attrs).get("class") or "").split():
+            self._date_tag = tag
+            self._date_tag_depth = 1
+            self._date_text = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "table" and self._table_depth > 0:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self.table_complete = True
+        if tag == self._date_tag:
+            self._date_tag_depth -= 1
+            if self._date_tag_depth == 0:
+                text = "".join(self._date_text)
+                if "godzinowe" in text and re.search(r"\d{2}-\d{2}-\d{4}", text):
+                    self.date_found = True
+                self._date_tag = None
+
+    def handle_data(self, data: str) -> None:
+        if self._date_tag is not None:
+            self._date_text.append(data)
+
+
 class TgeConnector:
 
     @staticmethod
@@ -82,19 +134,42 @@ class TgeConnector:
 
     @staticmethod
     def get_data_for_date(date: datetime.date) -> TgeDayData | None:
-        _LOGGER.debug("Downloading TGE data for date {}...", date)
-        response = requests.get(DATA_URL_TEMPLATE.format((date - datetime.timedelta(days=1)).strftime("%d-%m-%Y")))
-        _LOGGER.debug("Downloaded TGE data for date {} [{}]: {}", date, response.status_code, response.text)
-        if response.status_code != 200:
-            _LOGGER.error("Failed to download TGE data: {}", response.status_code)
-            raise TgeException("Failed to download TGE data")
-        parser = BeautifulSoup(response.text, "html.parser")
+        _LOGGER.debug("Downloading TGE data for date %s...", date)
+        start = time.perf_counter()
+        url = DATA_URL_TEMPLATE.format((date - datetime.timedelta(days=1)).strftime("%d-%m-%Y"))
+        with requests.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            if response.status_code != 200:
+                _LOGGER.error("Failed to download TGE data: %s", response.status_code)
+                raise TgeException("Failed to download TGE data")
+            text = TgeConnector._read_until_timetable(response)
+            _LOGGER.debug("Downloaded TGE data for date %s [%s]: %d bytes transferred, %d characters parsed in %.3f s",
+                          date, response.status_code, response.raw.tell(), len(text), time.perf_counter() - start)
+        return TgeConnector._parse_page(text, date)
+
+    @staticmethod
+    def _parse_page(text: str, date: datetime.date) -> TgeDayData | None:
+        parser = BeautifulSoup(text, "html.parser")
         date_of_data = TgeConnector._get_date_of_data(parser)
         if date != date_of_data:
             return None
         data = TgeConnector._parse_timetable(parser, date)
         return TgeDayData(date, data)
 
+    @staticmethod
+    def _read_until_timetable(response: requests.Response) -> str:
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        scanner = TgeStreamScanner()
+        chunks = []
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            text = decoder.decode(chunk)
+            chunks.append(text)
+            scanner.feed(text)
+            if scanner.done:
+                break
+        else:
+            chunks.append(decoder.decode(b"", final=True))
+        return "".join(chunks)
+
     @staticmethod
     def _get_date_of_data(html_parser: Tag) -> datetime.date:
         date_texts = list(filter(lambda l: len(l) > 0,
@@ -115,19 +190,26 @@ class TgeConnector:
 
     @staticmethod
     def _parse_timetable(html_parser: Tag, date_of_data: datetime.date) -> list[TgeHourData]:
-        return list(
-            map(lambda row: TgeConnector._parse_row(row, date_of_data), TgeConnector._get_rows_of_table(html_parser)))
+        hours = []
+        seen_hours = set()
+        for row in TgeConnector._get_rows_of_table(html_parser):
+            hour = TgeConnector._get_hour_of_row(row)
+            # The hour repeated when DST ends is listed twice; the second one is the later (fold=1) occurrence.
+            fold = 1 if hour in seen_hours else 0
+            seen_hours.add(hour)
+            hours.append(TgeConnector._parse_row(row, date_of_data, hour, fold))
+        return hours
 
     @staticmethod
     def _get_rows_of_table(html_parser: Tag) -> list[Tag]:
         valid_pattern = r"^\d\d?-\d\d?$"
-        all_rows = html_parser.select("#footable_kontrakty_godzinowe > tbody")[0].select("tr")
+        all_rows = html_parser.select(f"#{TIMETABLE_ID} > tbody")[0].select("tr")
         filtered_rows = list(filter(lambda r: re.match(valid_pattern, r.select("td")[0].text.strip()), all_rows))
         return filtered_rows
 
     @staticmethod
-    def _parse_row(row: Tag, date_of_data: datetime.date) -> TgeHourData:
-        time_of_row = TgeConnector._get_time_of_row(row, date_of_data)
+    def _parse_row(row: Tag, date_of_data: datetime.date, hour: int, fold: int) -> TgeHourData:
+        time_of_row = TgeConnector._get_time_of_row(date_of_data, hour, fold)
         fixing1_rate = TgeConnector._get_float_from_column(row, 1)
         fixing1_volume = TgeConnector._get_float_from_column(row, 2)
         fixing2_rate = TgeConnector._get_float_from_column(row, 3)
@@ -135,12 +217,14 @@ class TgeConnector:
         return TgeHourData(time_of_row, fixing1_rate, fixing1_volume, fixing2_rate, fixing2_volume)
 
     @staticmethod
-    def _get_time_of_row(row: Tag, date_of_data: datetime.date) -> datetime:
-        timezone = datetime.datetime.now().astimezone().tzinfo
+    def _get_hour_of_row(row: Tag) -> int:
         from_to = row.select("td")[0].text.strip().split("-")
-        from_time = datetime.time(hour=int(from_to[0]))
-        datetime_from = datetime.datetime.combine(date_of_data, from_time, timezone)
-        return datetime_from
+        return int(from_to[0])
+
+    @staticmethod
+    def _get_time_of_row(date_of_data: datetime.date, hour: int, fold: int) -> datetime.datetime:
+        from_time = datetime.time(hour=hour, fold=fold)
+        return datetime.datetime.combine(date_of_data, from_time, ZoneInfo(TIMEZONE))
 
     @staticmethod
     def _get_float_from_column(row: Tag, number: int) -> float:
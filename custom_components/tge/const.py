@@ -1,13 +1,22 @@
+"""Constants for TGE integration.
+
+This module is shared with the command-line tool, so it must not import Home Assistant.
+"""
 from datetime import timedelta
+from enum import IntFlag
 from typing import Final
 
-from homeassistant.const import Platform, UnitOfEnergy
-
 DOMAIN: Final = "tge"
 DEFAULT_NAME: Final = "TGE"
-DEFAULT_UPDATE_INTERVAL: Final = timedelta(minutes=1)
+DEFAULT_UPDATE_INTERVAL: Final = timedelta(hours=1)
+RETRY_UPDATE_INTERVAL: Final = timedelta(minutes=1)
+TEMPLATE_RATE_LIMIT: Final = timedelta(minutes=1).total_seconds()
 URL: Final = 'https://tge.pl/energia-elektryczna-rdn'
 DATA_URL_TEMPLATE: Final = URL + "?dateShow={}"
+TIMETABLE_ID: Final = "footable_kontrakty_godzinowe"
+CHUNK_SIZE: Final = 4 * 1024
+REQUEST_TIMEOUT: Final = (10, 30)
+TIMEZONE: Final = "Europe/Warsaw"
 
 ATTRIBUTE_TODAY_SUFFIX: Final = "_today"
 ATTRIBUTE_TOMORROW_SUFFIX: Final = "_tomorrow"
@@ -23,14 +32,14 @@ PARAMETER_FIXING_2_VOLUME = "fixing2_volume"
 
 UNIT_CURRENCY_Zl: Final = "zł"
 UNIT_CURRENCY_GR: Final = "gr"
+UNIT_CURRENCY_PLN: Final = "PLN"
 
-UNIT_ZL_MWH = f"{UNIT_CURRENCY_Zl}/{UnitOfEnergy.MEGA_WATT_HOUR}"
-UNIT_GR_KWH = f"{UNIT_CURRENCY_GR}/{UnitOfEnergy.KILO_WATT_HOUR}"
-UNIT_ZL_KWH = f"{UNIT_CURRENCY_Zl}/{UnitOfEnergy.KILO_WATT_HOUR}"
+UNIT_MWH: Final = "MWh"
+UNIT_KWH: Final = "kWh"
 
-PLATFORMS = [
-    Platform.SENSOR
-]
+UNIT_ZL_MWH = f"{UNIT_CURRENCY_Zl}/{UNIT_MWH}"
+UNIT_GR_KWH = f"{UNIT_CURRENCY_GR}/{UNIT_KWH}"
+UNIT_ZL_KWH = f"{UNIT_CURRENCY_Zl}/{UNIT_KWH}"
 
 CONF_UNIT: Final = "unit"
 CONF_USE_STATE_TEMPLATES: Final = "use_state_templates"
@@ -38,3 +47,31 @@ CONF_STATE_TEMPLATE_FIXING_1_RATE: Final = "state_template_" + PARAMETER_FIXING_
 CONF_STATE_TEMPLATE_FIXING_1_VOLUME: Final = "state_template_" + PARAMETER_FIXING_1_VOLUME
 CONF_STATE_TEMPLATE_FIXING_2_RATE: Final = "state_template_" + PARAMETER_FIXING_2_RATE
 CONF_STATE_TEMPLATE_FIXING_2_VOLUME: Final = "state_template_" + PARAMETER_FIXING_2_VOLUME
+CONF_ENERGY_SENSOR: Final = "energy_sensor"
+CONF_BATTERY_CAPACITY: Final = "battery_capacity"
+CONF_BATTERY_CHARGE_POWER: Final = "battery_charge_power"
+CONF_BATTERY_DISCHARGE_POWER: Final = "battery_discharge_power"
+CONF_BATTERY_EFFICIENCY: Final = "battery_efficiency"
+CONF_BATTERY_INITIAL_SOC: Final = "battery_initial_soc"
+CONF_BATTERY_SOC_SENSOR: Final = "battery_soc_sensor"
+
+DEFAULT_BATTERY_CAPACITY: Final = 0
+DEFAULT_BATTERY_POWER: Final = 0
+DEFAULT_BATTERY_EFFICIENCY: Final = 90
+DEFAULT_BATTERY_INITIAL_SOC: Final = 0
+
+SERVICE_OPTIMIZE_BATTERY: Final = "optimize_battery"
+
+ATTRIBUTE_CAPACITY: Final = "capacity"
+ATTRIBUTE_CHARGE_POWER: Final = "charge_power"
+ATTRIBUTE_DISCHARGE_POWER: Final = "discharge_power"
+ATTRIBUTE_EFFICIENCY: Final = "efficiency"
+ATTRIBUTE_INITIAL_SOC: Final = "initial_soc"
+ATTRIBUTE_SCHEDULE: Final = "schedule"
+ATTRIBUTE_PROFIT: Final = "profit"
+
+
+class TgeEntityFeature(IntFlag):
+    """Supported features of TGE entities, used to limit targets of entity services."""
+
+    BATTERY_SCHEDULE = 1
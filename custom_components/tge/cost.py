@@ -0,0 +1,69 @@
+"""Energy cost accumulation for TGE integration."""
+
+from __future__ import annotations
+
+import datetime
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+def get_hour_start(now: datetime.datetime) -> datetime.datetime:
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def get_day_start(now: datetime.datetime) -> datetime.datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class TgeCostAccumulator:
+    last_energy: float | None = None
+    period_start: datetime.datetime | None = None
+    total_cost: float = 0
+    last_update: datetime.datetime | None = None
+
+    def add_reading(self, energy: float, now: datetime.datetime,
+                    get_price: Callable[[datetime.datetime], float | None]) -> None:
+        """Add cost of energy consumed since the previous meter reading (in MWh) to the open period.
+
+        Consumption between readings is assumed to be uniform, so it is split at every slot boundary and each part
+        is priced with the rate of its own slot. A decreasing meter is treated as a reset and only stored.
+        """
+        last_energy = self.last_energy
+        last_update = self.last_update
+        self.last_energy = energy
+        self.last_update = now
+        if last_energy is None or last_update is None or energy < last_energy or now <= last_update:
+            return
+        delta = energy - last_energy
+        duration = now - last_update
+        start = last_update
+        while start < now:
+            end = min(get_hour_start(start) + datetime.timedelta(hours=1), now)
+            price = get_price(start)
+            if price is not None:
+                self.total_cost += delta * ((end - start) / duration) * price
+            start = end
+
+    def reset_period(self, period_start: datetime.datetime) -> None:
+        self.period_start = period_start
+        self.total_cost = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "last_energy": self.last_energy,
+            "period_start": self.period_start.isoformat() if self.period_start is not None else None,
+            "total_cost": self.total_cost,
+            "last_update": self.last_update.isoformat() if self.last_update is not None else None
+        }
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> TgeCostAccumulator:
+        period_start = data.get("period_start")
+        last_update = data.get("last_update")
+        return TgeCostAccumulator(
+            data.get("last_energy"),
+            datetime.datetime.fromisoformat(period_start) if period_start is not None else None,
+            data.get("total_cost", 0),
+            datetime.datetime.fromisoformat(last_update) if last_update is not None else None
+        )
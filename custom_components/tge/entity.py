@@ -2,20 +2,18 @@ from __future__ import annotations
 
 import datetime
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.restore_state import RestoreEntity, ExtraStoredData
-from homeassistant.helpers.template import Template
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .connector import TgeData, TgeHourData, TgeDayData
-from .const import DEFAULT_NAME, DOMAIN, URL, CONF_STATE_TEMPLATE_FIXING_1_RATE, CONF_STATE_TEMPLATE_FIXING_1_VOLUME, \
-    CONF_STATE_TEMPLATE_FIXING_2_RATE, CONF_STATE_TEMPLATE_FIXING_2_VOLUME, PARAMETER_FIXING_1_RATE, \
-    PARAMETER_FIXING_1_VOLUME, PARAMETER_FIXING_2_RATE, PARAMETER_FIXING_2_VOLUME
+from .connector import TgeHourData, TgeDayData
+from .cost import TgeCostAccumulator
+from .const import DEFAULT_NAME, DOMAIN, URL
 from .update_coordinator import TgeUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -53,20 +51,30 @@ class TgeEntityStoredData(ExtraStoredData):
         return TgeEntityStoredData(parsed)
 
 
+@dataclass
+class TgeCostStoredData(TgeEntityStoredData):
+    cost: TgeCostAccumulator = field(default_factory=TgeCostAccumulator)
+
+    def as_dict(self) -> dict[str, Any]:
+        output = super().as_dict()
+        output["cost"] = self.cost.as_dict()
+        return output
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> TgeCostStoredData:
+        cache = TgeEntityStoredData.from_dict(data).cache
+        return TgeCostStoredData(cache, TgeCostAccumulator.from_dict(data.get("cost", {})))
+
+
 class TgeEntity(RestoreEntity, CoordinatorEntity):
 
     def __init__(self, coordinator: TgeUpdateCoordinator, config_entry: ConfigEntry) -> None:
         super().__init__(coordinator)
         self._config_entry = config_entry
-        self._stored_data: TgeEntityStoredData = TgeEntityStoredData({})
-        self._calculated_data: TgeEntityStoredData = TgeEntityStoredData({})
-        self.fixing_1_rate_template = config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_1_RATE, "")
-        self.fixing_1_volume_template = config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_1_VOLUME, "")
-        self.fixing_2_rate_template = config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_2_RATE, "")
-        self.fixing_2_volume_template = config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_2_VOLUME, "")
+        self._last_state_signature: tuple | None = None
 
     def get_data(self) -> TgeEntityStoredData | None:
-        return self._calculated_data
+        return TgeEntityStoredData(self.coordinator.cache)
 
     @property
     def name(self) -> str:
@@ -91,66 +99,33 @@ class TgeEntity(RestoreEntity, CoordinatorEntity):
     def extra_state_attributes(self) -> dict[str, Any]:
         return {}
 
+    @property
+    def available(self) -> bool:
+        # A failed fetch doesn't invalidate cached data, as long as it covers the current slot.
+        return super().available or self.coordinator.has_current_data()
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        today = datetime.date.today()
-        last_data: TgeData | None = self.coordinator.data
-        if last_data is None:
+        self.async_write_ha_state_if_changed()
+
+    def state_signature(self) -> tuple:
+        return self.available, self.state, self.coordinator.data_version, datetime.date.today()
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        signature = self.state_signature()
+        if signature == self._last_state_signature:
             return
-        for day_data in last_data.data:
-            self._stored_data.cache[day_data.date] = day_data
-        _LOGGER.debug("cleaning up: {}", self._stored_data.cache)
-        keys = [*self._stored_data.cache.keys()]
-        for key in keys:
-            if key < today:
-                self._stored_data.cache.pop(key)
-
-        self._calculated_data = self._calculate_stored_data(self._stored_data)
+        self._last_state_signature = signature
         self.async_write_ha_state()
 
     @property
     def extra_restore_state_data(self) -> TgeEntityStoredData:
-        return TgeEntityStoredData.from_dict(self._stored_data.as_dict())
+        return TgeEntityStoredData(dict(self.coordinator.stored_cache))
 
     async def async_added_to_hass(self) -> None:
         last_extra_data = await self.async_get_last_extra_data()
-        _LOGGER.debug("Restored last data: {}", last_extra_data)
-        if last_extra_data is None:
-            self._stored_data = TgeEntityStoredData({})
-        else:
-            self._stored_data = TgeEntityStoredData.from_dict(last_extra_data.as_dict())
-        self._calculated_data = self._calculate_stored_data(self._stored_data)
+        _LOGGER.debug("Restored last data: %s", last_extra_data)
+        if last_extra_data is not None:
+            self.coordinator.async_restore(TgeEntityStoredData.from_dict(last_extra_data.as_dict()).cache)
         await super().async_added_to_hass()
-
-    def _calculate_stored_data(self, data: TgeEntityStoredData) -> TgeEntityStoredData:
-        if data.cache is None:
-            return TgeEntityStoredData({})
-        new_data = {}
-        for date, date_data in data.cache.items():
-            new_data[date] = self._calculate_all_templates(date_data)
-        return TgeEntityStoredData(new_data)
-
-    def _calculate_all_templates(self, data: TgeDayData) -> TgeDayData:
-        return TgeDayData(data.date, list(map(lambda h: self._calculate_templates(h), data.hours)))
-
-    def _calculate_templates(self, data: TgeHourData) -> TgeHourData:
-        templated_fixing1_rate = self._calculate_template(data, self.fixing_1_rate_template, data.fixing1_rate)
-        templated_fixing1_volume = self._calculate_template(data, self.fixing_1_volume_template, data.fixing1_volume)
-        templated_fixing2_rate = self._calculate_template(data, self.fixing_2_rate_template, data.fixing2_rate)
-        templated_fixing2_volume = self._calculate_template(data, self.fixing_2_volume_template, data.fixing2_volume)
-        return TgeHourData(data.time, templated_fixing1_rate, templated_fixing1_volume, templated_fixing2_rate,
-                           templated_fixing2_volume)
-
-    def _calculate_template(self, data: TgeHourData, template: str, default: float) -> float:
-        if template == "":
-            return default
-        now_func = lambda: data.time
-        return Template(template, self.hass).async_render(
-            {
-                PARAMETER_FIXING_1_RATE: data.fixing1_rate,
-                PARAMETER_FIXING_1_VOLUME: data.fixing1_volume,
-                PARAMETER_FIXING_2_RATE: data.fixing2_rate,
-                PARAMETER_FIXING_2_VOLUME: data.fixing2_volume,
-                "now": now_func
-            }
-        )
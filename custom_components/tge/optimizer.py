@@ -0,0 +1,166 @@
+"""Battery schedule optimizer for TGE integration."""
+
+from __future__ import annotations
+
+import datetime
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+from .connector import TgeHourData
+from .const import CONF_BATTERY_CAPACITY, CONF_BATTERY_CHARGE_POWER, CONF_BATTERY_DISCHARGE_POWER, \
+    CONF_BATTERY_EFFICIENCY, CONF_BATTERY_INITIAL_SOC, DEFAULT_BATTERY_CAPACITY, DEFAULT_BATTERY_POWER, \
+    DEFAULT_BATTERY_EFFICIENCY, DEFAULT_BATTERY_INITIAL_SOC, ATTRIBUTE_CAPACITY, ATTRIBUTE_CHARGE_POWER, \
+    ATTRIBUTE_DISCHARGE_POWER, ATTRIBUTE_EFFICIENCY, ATTRIBUTE_INITIAL_SOC, ATTRIBUTE_SCHEDULE, ATTRIBUTE_PROFIT
+
+ACTION_CHARGE = "charge"
+ACTION_DISCHARGE = "discharge"
+ACTION_IDLE = "idle"
+DEFAULT_LEVELS = 100
+
+
+@dataclass
+class TgeBatteryParameters:
+    capacity: float
+    charge_power: float
+    discharge_power: float
+    efficiency: float
+    initial_energy: float
+
+    @staticmethod
+    def from_options(options: Mapping[str, Any], overrides: Mapping[str, Any],
+                     soc: float | None = None) -> TgeBatteryParameters:
+        """Combine integration options with parameters of an action; `soc` replaces configured initial SoC."""
+        capacity = overrides.get(ATTRIBUTE_CAPACITY, options.get(CONF_BATTERY_CAPACITY, DEFAULT_BATTERY_CAPACITY))
+        initial_soc = overrides.get(ATTRIBUTE_INITIAL_SOC)
+        if initial_soc is None:
+            initial_soc = soc if soc is not None else options.get(CONF_BATTERY_INITIAL_SOC,
+                                                                   DEFAULT_BATTERY_INITIAL_SOC)
+        return TgeBatteryParameters(
+            capacity,
+            overrides.get(ATTRIBUTE_CHARGE_POWER, options.get(CONF_BATTERY_CHARGE_POWER, DEFAULT_BATTERY_POWER)),
+            overrides.get(ATTRIBUTE_DISCHARGE_POWER,
+                          options.get(CONF_BATTERY_DISCHARGE_POWER, DEFAULT_BATTERY_POWER)),
+            overrides.get(ATTRIBUTE_EFFICIENCY, options.get(CONF_BATTERY_EFFICIENCY, DEFAULT_BATTERY_EFFICIENCY)) / 100,
+            capacity * min(max(initial_soc, 0), 100) / 100
+        )
+
+
+@dataclass
+class TgeBatterySlot:
+    time: datetime.datetime
+    price: float
+    power: float
+    energy: float
+    action: str
+
+    def to_dict(self, convert_price: Callable[[float], float]) -> dict[str, Any]:
+        return {
+            "time": self.time.isoformat(),
+            "price": convert_price(self.price),
+            "power": self.power,
+            "energy": self.energy,
+            "action": self.action
+        }
+
+
+@dataclass
+class TgeBatterySchedule:
+    slots: list[TgeBatterySlot]
+    profit: float
+
+    def get_slot(self, time: datetime.datetime) -> TgeBatterySlot | None:
+        for slot in self.slots:
+            if slot.time == time:
+                return slot
+        return None
+
+    def to_dict(self, convert_price: Callable[[float], float] = lambda p: p) -> dict[str, Any]:
+        """Slot prices are stored in zł/MWh, `convert_price` converts them to the unit of output."""
+        return {
+            ATTRIBUTE_PROFIT: self.profit,
+            ATTRIBUTE_SCHEDULE: [s.to_dict(convert_price) for s in self.slots]
+        }
+
+
+class TgeBatteryOptimizer:
+
+    @staticmethod
+    def optimize(hours: list[TgeHourData], parameters: TgeBatteryParameters,
+                 levels: int = DEFAULT_LEVELS) -> TgeBatterySchedule:
+        """Maximize arbitrage profit of a battery over given slots using Fixing 1 rates.
+
+        State of charge is discretized into `levels` steps. For every slot the best transition from each level is found
+        with sliding window maxima, so the whole run takes O(slots * levels).
+        """
+        if len(hours) == 0 or parameters.capacity <= 0:
+            return TgeBatterySchedule([], 0)
+        slot_hours = TgeBatteryOptimizer._get_slot_hours(hours)
+        step = parameters.capacity / levels
+        max_up = min(levels, math.floor(parameters.charge_power * slot_hours / step + 1e-9))
+        max_down = min(levels, math.floor(parameters.discharge_power * slot_hours / step + 1e-9))
+        one_way_efficiency = math.sqrt(max(min(parameters.efficiency, 1), 1e-6))
+        energies = [i * step for i in range(levels + 1)]
+
+        values = [0.0] * (levels + 1)
+        choices: list[list[int]] = [[]] * len(hours)
+        for t in range(len(hours) - 1, -1, -1):
+            price = hours[t].fixing1_rate / 1000
+            charge_price = price / one_way_efficiency
+            discharge_price = price * one_way_efficiency
+            charge = TgeBatteryOptimizer._window_max(
+                [values[j] - charge_price * energies[j] for j in range(levels + 1)], 0, max_up)
+            discharge = TgeBatteryOptimizer._window_max(
+                [values[j] - discharge_price * energies[j] for j in range(levels + 1)], max_down, 0)
+            new_values = [0.0] * (levels + 1)
+            choice = [0] * (levels + 1)
+            for i in range(levels + 1):
+                charge_value = charge[i][0] + charge_price * energies[i]
+                discharge_value = discharge[i][0] + discharge_price * energies[i]
+                if charge_value >= discharge_value:
+                    new_values[i], choice[i] = charge_value, charge[i][1]
+                else:
+                    new_values[i], choice[i] = discharge_value, discharge[i][1]
+            values = new_values
+            choices[t] = choice
+
+        level = min(levels, max(0, round(parameters.initial_energy / step)))
+        profit = values[level]
+        slots = []
+        for t, hour in enumerate(hours):
+            next_level = choices[t][level]
+            delta = energies[next_level] - energies[level]
+            action = ACTION_IDLE
+            if next_level > level:
+                action = ACTION_CHARGE
+            elif next_level < level:
+                action = ACTION_DISCHARGE
+            slots.append(TgeBatterySlot(hour.time, hour.fixing1_rate, round(delta / slot_hours, 3),
+                                        round(energies[next_level], 3), action))
+            level = next_level
+        return TgeBatterySchedule(slots, round(profit, 2))
+
+    @staticmethod
+    def _get_slot_hours(hours: list[TgeHourData]) -> float:
+        if len(hours) < 2:
+            return 1
+        return (hours[1].time - hours[0].time).total_seconds() / 3600
+
+    @staticmethod
+    def _window_max(values: list[float], before: int, after: int) -> list[tuple[float, int]]:
+        # For every i returns maximum (and its index) of values[i - before:i + after + 1].
+        output = []
+        window = deque()
+        size = len(values)
+        added = 0
+        for i in range(size):
+            while added < size and added <= i + after:
+                while len(window) > 0 and values[window[-1]] <= values[added]:
+                    window.pop()
+                window.append(added)
+                added += 1
+            while window[0] < i - before:
+                window.popleft()
+            output.append((values[window[0]], window[0]))
+        return output
@@ -1,19 +1,32 @@
 import datetime
 import logging
-from typing import Any
+import time
+from typing import Any, Callable
 
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+import voluptuous as vol
+from homeassistant.components.sensor import SensorEntity, SensorStateClass, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.const import UnitOfEnergy, UnitOfPower, ATTR_UNIT_OF_MEASUREMENT, STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, Event, EventStateChangedData, ServiceResponse, SupportsResponse, \
+    callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util.unit_conversion import EnergyConverter
 
+from .attributes import UNRECORDED_ATTRIBUTES, get_series_attributes, convert_price
 from .connector import TgeHourData
-from .const import (DOMAIN, ATTRIBUTE_PRICES, ATTRIBUTE_TODAY_SUFFIX, ATTRIBUTE_TOMORROW_SUFFIX,
-                    ATTRIBUTE_PARAMETER_PRICE, ATTRIBUTE_PARAMETER_VOLUME, ATTRIBUTE_VOLUMES, CONF_UNIT, UNIT_ZL_MWH,
-                    UNIT_GR_KWH, UNIT_ZL_KWH, PARAMETER_FIXING_1_RATE, PARAMETER_FIXING_1_VOLUME,
-                    PARAMETER_FIXING_2_RATE, PARAMETER_FIXING_2_VOLUME)
-from .entity import TgeEntity
+from .const import (DOMAIN, ATTRIBUTE_PRICES, ATTRIBUTE_PARAMETER_PRICE, ATTRIBUTE_PARAMETER_VOLUME,
+                    ATTRIBUTE_VOLUMES, CONF_UNIT, UNIT_ZL_MWH, UNIT_GR_KWH, UNIT_ZL_KWH, PARAMETER_FIXING_1_RATE,
+                    PARAMETER_FIXING_1_VOLUME, PARAMETER_FIXING_2_RATE, PARAMETER_FIXING_2_VOLUME, CONF_ENERGY_SENSOR,
+                    UNIT_CURRENCY_PLN, CONF_BATTERY_CAPACITY, DEFAULT_BATTERY_CAPACITY, SERVICE_OPTIMIZE_BATTERY,
+                    ATTRIBUTE_CAPACITY, ATTRIBUTE_CHARGE_POWER, ATTRIBUTE_DISCHARGE_POWER, ATTRIBUTE_EFFICIENCY,
+                    ATTRIBUTE_INITIAL_SOC, ATTRIBUTE_SCHEDULE, ATTRIBUTE_PROFIT, CONF_BATTERY_SOC_SENSOR,
+                    TgeEntityFeature)
+from .cost import TgeCostAccumulator, get_hour_start, get_day_start
+from .entity import TgeEntity, TgeCostStoredData
+from .optimizer import TgeBatteryOptimizer, TgeBatteryParameters, TgeBatterySchedule
 from .update_coordinator import TgeUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,10 +40,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
         TgeFixing2RateSensor(coordinator, entry),
         TgeFixing2VolumeSensor(coordinator, entry)
     ]
+    if entry.options.get(CONF_ENERGY_SENSOR, "") != "":
+        entities.append(TgeHourlyCostSensor(coordinator, entry))
+        entities.append(TgeDailyCostSensor(coordinator, entry))
+    if entry.options.get(CONF_BATTERY_CAPACITY, DEFAULT_BATTERY_CAPACITY) > 0:
+        entities.append(TgeBatteryScheduleSensor(coordinator, entry))
     async_add_entities(entities)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_OPTIMIZE_BATTERY,
+        {
+            vol.Optional(ATTRIBUTE_CAPACITY): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(ATTRIBUTE_CHARGE_POWER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(ATTRIBUTE_DISCHARGE_POWER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Optional(ATTRIBUTE_EFFICIENCY): vol.All(vol.Coerce(float), vol.Range(min=1, max=100)),
+            vol.Optional(ATTRIBUTE_INITIAL_SOC): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+        },
+        "async_optimize_battery",
+        required_features=[TgeEntityFeature.BATTERY_SCHEDULE],
+        supports_response=SupportsResponse.ONLY,
+    )
+
 
 class TgeSensor(TgeEntity, SensorEntity):
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
     _data_parameter_name: str
     _state_attribute_name: str
     _state_attribute_parameter_name: str
@@ -39,12 +73,7 @@ class TgeSensor(TgeEntity, SensorEntity):
         super().__init__(coordinator, config_entry)
 
     def get_parameter_value(self, data: TgeHourData) -> float:
-        value = getattr(data, self._data_parameter_name)
-        if self.native_unit_of_measurement == UNIT_GR_KWH:
-            value = round(value / 10, 3)
-        elif self.native_unit_of_measurement == UNIT_ZL_KWH:
-            value = round(value / 1000, 5)
-        return value
+        return convert_price(getattr(data, self._data_parameter_name), self.native_unit_of_measurement)
 
     @property
     def native_value(self) -> float | None:
@@ -66,19 +95,9 @@ class TgeSensor(TgeEntity, SensorEntity):
         output = super().extra_state_attributes
         data = self.get_data()
         if data is not None:
-            values = list(
-                map(lambda d: {
-                    "time": d.time,
-                    self._state_attribute_parameter_name: self.get_parameter_value(d)
-                }, data.combined_hours()))
-
-            today = datetime.date.today()
-            tomorrow = today + datetime.timedelta(days=1)
-            values_today = list(filter(lambda d: d["time"].date() == today, values))
-            values_tomorrow = list(filter(lambda d: d["time"].date() == tomorrow, values))
-            output[f"{self._state_attribute_name}{ATTRIBUTE_TODAY_SUFFIX}"] = values_today
-            output[f"{self._state_attribute_name}{ATTRIBUTE_TOMORROW_SUFFIX}"] = values_tomorrow
-            output[self._state_attribute_name] = values
+            output.update(get_series_attributes(data.combined_hours(), self._state_attribute_name,
+                                                self._state_attribute_parameter_name, self.get_parameter_value,
+                                                datetime.date.today()))
         return output
 
     @property
@@ -189,3 +208,241 @@ class TgeFixing2VolumeSensor(TgeSensor):
     @property
     def native_unit_of_measurement(self) -> str:
         return UnitOfEnergy.MEGA_WATT_HOUR
+
+
+class TgeCostSensor(TgeEntity, SensorEntity):
+
+    def __init__(self, coordinator: TgeUpdateCoordinator, config_entry: ConfigEntry, cost_type: str,
+                 get_period_start: Callable[[datetime.datetime], datetime.datetime]) -> None:
+        super().__init__(coordinator, config_entry)
+        self._cost_type = cost_type
+        self._get_period_start = get_period_start
+        self._attr_device_class = SensorDeviceClass.MONETARY
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_native_unit_of_measurement = UNIT_CURRENCY_PLN
+        self._attr_suggested_display_precision = 2
+        self._energy_sensor: str = config_entry.options.get(CONF_ENERGY_SENSOR)
+        self._cost: TgeCostAccumulator = TgeCostAccumulator()
+        self._price_slot: datetime.datetime | None = None
+        self._price_version: int | None = None
+        self._price: float | None = None
+
+    @property
+    def native_value(self) -> float | None:
+        if self._cost.period_start is None:
+            return None
+        return round(self._cost.total_cost, 5)
+
+    @property
+    def last_reset(self) -> datetime.datetime | None:
+        return self._cost.period_start
+
+    def state_signature(self) -> tuple:
+        return *super().state_signature(), self._cost.period_start
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        output = super().extra_state_attributes
+        output[CONF_ENERGY_SENSOR] = self._energy_sensor
+        return output
+
+    @property
+    def icon(self) -> str:
+        return "mdi:cash-multiple"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{super().unique_id}_sensor_cost_{self._cost_type}"
+
+    @property
+    def extra_restore_state_data(self) -> TgeCostStoredData:
+        return TgeCostStoredData(dict(self.coordinator.stored_cache), self._cost)
+
+    async def async_added_to_hass(self) -> None:
+        last_extra_data = await self.async_get_last_extra_data()
+        if last_extra_data is not None:
+            self._cost = TgeCostStoredData.from_dict(last_extra_data.as_dict()).cost
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_state_change_event(self.hass, [self._energy_sensor], self._handle_energy_update))
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._reset_period_if_needed(datetime.datetime.now().astimezone())
+        super()._handle_coordinator_update()
+
+    @callback
+    def _handle_energy_update(self, event: Event[EventStateChangedData]) -> None:
+        new_state = event.data["new_state"]
+        if new_state is None or new_state.state in [STATE_UNAVAILABLE, STATE_UNKNOWN]:
+            return
+        try:
+            energy = EnergyConverter.convert(float(new_state.state),
+                                             new_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT),
+                                             UnitOfEnergy.MEGA_WATT_HOUR)
+        except (ValueError, TypeError, KeyError, HomeAssistantError):
+            _LOGGER.debug("Invalid state of energy sensor %s: %s", self._energy_sensor, new_state.state)
+            return
+        now = datetime.datetime.now().astimezone()
+        # Energy consumed since the previous reading is booked to the period that is open now; when the reading
+        # arrives after a period boundary, that includes the part consumed before it, priced with its own slot.
+        self._cost.add_reading(energy, now, self._get_price)
+        self._reset_period_if_needed(now)
+        self.async_write_ha_state_if_changed()
+
+    def _reset_period_if_needed(self, now: datetime.datetime) -> bool:
+        period_start = self._get_period_start(now)
+        if self._cost.period_start == period_start:
+            return False
+        if self._cost.period_start is not None:
+            self.async_write_ha_state_if_changed()
+        self._cost.reset_period(period_start)
+        return True
+
+    def _get_price(self, when: datetime.datetime) -> float | None:
+        slot = get_hour_start(when)
+        if self._price_slot == slot and self._price_version == self.coordinator.data_version:
+            return self._price
+        data = self.get_data()
+        price = None
+        day_data = data.cache.get(slot.date()) if data is not None else None
+        if day_data is not None:
+            hour_data = list(filter(lambda h: h.time == slot, day_data.hours))
+            if len(hour_data) > 0:
+                price = hour_data[0].fixing1_rate
+        if price is None and self._price_slot == slot:
+            # Last slot of the previous day is pruned from the coordinator at midnight, before its last reading.
+            return self._price
+        if slot == get_hour_start(datetime.datetime.now().astimezone()):
+            self._price_slot = slot
+            self._price_version = self.coordinator.data_version
+            self._price = price
+        return price
+
+
+class TgeHourlyCostSensor(TgeCostSensor):
+
+    def __init__(self, coordinator: TgeUpdateCoordinator, config_entry: ConfigEntry) -> None:
+        super().__init__(coordinator, config_entry, "hourly", get_hour_start)
+
+    @property
+    def name(self) -> str:
+        return f"{self.base_name()} Hourly Cost"
+
+
+class TgeDailyCostSensor(TgeCostSensor):
+
+    def __init__(self, coordinator: TgeUpdateCoordinator, config_entry: ConfigEntry) -> None:
+        super().__init__(coordinator, config_entry, "daily", get_day_start)
+
+    @property
+    def name(self) -> str:
+        return f"{self.base_name()} Daily Cost"
+
+
+class TgeBatteryScheduleSensor(TgeEntity, SensorEntity):
+    _unrecorded_attributes = frozenset({ATTRIBUTE_SCHEDULE})
+
+    def __init__(self, coordinator: TgeUpdateCoordinator, config_entry: ConfigEntry) -> None:
+        super().__init__(coordinator, config_entry)
+        self._attr_device_class = SensorDeviceClass.POWER
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+        self._attr_suggested_display_precision = 2
+        self._attr_supported_features = TgeEntityFeature.BATTERY_SCHEDULE
+        self._soc_sensor: str = config_entry.options.get(CONF_BATTERY_SOC_SENSOR, "")
+        self._schedule: TgeBatterySchedule | None = None
+        self._schedule_key: tuple | None = None
+        self._soc_slot: datetime.datetime | None = None
+
+    @property
+    def native_value(self) -> float | None:
+        if self._schedule is None:
+            return None
+        slot = self._schedule.get_slot(datetime.datetime.now().astimezone().replace(minute=0, second=0, microsecond=0))
+        if slot is None:
+            return None
+        return slot.power
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        output = super().extra_state_attributes
+        if self._schedule is not None:
+            schedule = self._schedule.to_dict(self._convert_price)
+            output[ATTRIBUTE_PROFIT] = schedule[ATTRIBUTE_PROFIT]
+            output[ATTRIBUTE_SCHEDULE] = schedule[ATTRIBUTE_SCHEDULE]
+        return output
+
+    @property
+    def icon(self) -> str:
+        return "mdi:home-battery"
+
+    @property
+    def name(self) -> str:
+        return f"{self.base_name()} Battery Schedule"
+
+    @property
+    def unique_id(self) -> str:
+        return f"{super().unique_id}_sensor_battery_schedule"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        if self._soc_sensor != "":
+            self.async_on_remove(
+                async_track_state_change_event(self.hass, [self._soc_sensor], self._handle_soc_update))
+        self._update_schedule_if_needed()
+
+    async def async_optimize_battery(self, **kwargs: Any) -> ServiceResponse:
+        parameters = TgeBatteryParameters.from_options(self._config_entry.options, kwargs, self._get_soc())
+        if parameters.capacity <= 0:
+            raise ServiceValidationError("Battery capacity has to be greater than 0")
+        return self._get_schedule(parameters).to_dict(self._convert_price)
+
+    @callback
+    def async_write_ha_state_if_changed(self) -> None:
+        self._update_schedule_if_needed()
+        super().async_write_ha_state_if_changed()
+
+    def state_signature(self) -> tuple:
+        return *super().state_signature(), self._schedule
+
+    def _update_schedule_if_needed(self) -> None:
+        # Replanned when prices change and at every slot boundary, using the current state of charge.
+        slot_start = datetime.datetime.now().astimezone().replace(minute=0, second=0, microsecond=0)
+        schedule_key = (self.coordinator.data_version, slot_start)
+        if schedule_key == self._schedule_key:
+            return
+        self._schedule_key = schedule_key
+        start = time.perf_counter()
+        self._schedule = self._get_schedule(
+            TgeBatteryParameters.from_options(self._config_entry.options, {}, self._get_soc()))
+        _LOGGER.debug("Calculated battery schedule for %d slots in %.3f ms", len(self._schedule.slots),
+                      (time.perf_counter() - start) * 1000)
+
+    def _get_schedule(self, parameters: TgeBatteryParameters) -> TgeBatterySchedule:
+        slot_start = get_hour_start(datetime.datetime.now().astimezone())
+        hours = [h for h in self.get_data().combined_hours() if h.time >= slot_start]
+        return TgeBatteryOptimizer.optimize(hours, parameters)
+
+    def _get_soc(self) -> float | None:
+        soc_state = self.hass.states.get(self._soc_sensor) if self._soc_sensor != "" else None
+        if soc_state is None:
+            return None
+        try:
+            return float(soc_state.state)
+        except ValueError:
+            _LOGGER.debug("Invalid state of battery sensor %s: %s", self._soc_sensor, soc_state.state)
+            return None
+
+    def _convert_price(self, value: float) -> float:
+        return convert_price(value, self._config_entry.options.get(CONF_UNIT, UNIT_ZL_MWH))
+
+    @callback
+    def _handle_soc_update(self, _event: Event[EventStateChangedData]) -> None:
+        # A changed state of charge forces at most one replan per slot, in addition to the one at the slot boundary.
+        slot_start = get_hour_start(datetime.datetime.now().astimezone())
+        if self._soc_slot == slot_start or self._get_soc() is None:
+            return
+        self._soc_slot = slot_start
+        self._schedule_key = None
+        self.async_write_ha_state_if_changed()
@@ -1,41 +1,202 @@
 """Update coordinator for TGE integration."""
+import dataclasses
 import datetime
 import logging
 
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, Event, EventStateChangedData, CALLBACK_TYPE, callback, split_entity_id
+from homeassistant.exceptions import TemplateError
+from homeassistant.helpers.event import async_call_later, async_track_state_change_filtered, async_track_time_change, \
+    TrackStates, _TrackStateChangeFiltered
+from homeassistant.helpers.template import Template
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .connector import TgeConnector, TgeData
-from .const import DOMAIN, DEFAULT_UPDATE_INTERVAL
+from .connector import TgeConnector, TgeData, TgeDayData, TgeHourData
+from .const import DOMAIN, DEFAULT_UPDATE_INTERVAL, CONF_STATE_TEMPLATE_FIXING_1_RATE, \
+    CONF_STATE_TEMPLATE_FIXING_1_VOLUME, CONF_STATE_TEMPLATE_FIXING_2_RATE, CONF_STATE_TEMPLATE_FIXING_2_VOLUME, \
+    PARAMETER_FIXING_1_RATE, PARAMETER_FIXING_1_VOLUME, PARAMETER_FIXING_2_RATE, PARAMETER_FIXING_2_VOLUME, \
+    TEMPLATE_RATE_LIMIT, RETRY_UPDATE_INTERVAL
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class TgeUpdateCoordinator(DataUpdateCoordinator[TgeData]):
 
-    def __init__(self, hass: HomeAssistant):
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=DEFAULT_UPDATE_INTERVAL,
                          update_method=self.update_method)
         self.connector = TgeConnector()
-        self._last_update_hour: datetime.date | None = None
-        self._last_data: TgeData | None = None
+        self.stored_cache: dict[datetime.date, TgeDayData] = {}
+        self.cache: dict[datetime.date, TgeDayData] = {}
+        self.data_version = 0
+        template_sources = {
+            PARAMETER_FIXING_1_RATE: config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_1_RATE, ""),
+            PARAMETER_FIXING_1_VOLUME: config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_1_VOLUME, ""),
+            PARAMETER_FIXING_2_RATE: config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_2_RATE, ""),
+            PARAMETER_FIXING_2_VOLUME: config_entry.options.get(CONF_STATE_TEMPLATE_FIXING_2_VOLUME, ""),
+        }
+        self._templates: dict[str, Template] = {field: Template(template, hass) for (field, template) in
+                                                template_sources.items() if template != ""}
+        self._template_dependencies: dict[str, TrackStates] = {}
+        self._template_listener: _TrackStateChangeFiltered | None = None
+        self._template_tracking = False
+        self._rate_limit_listener: CALLBACK_TYPE | None = None
+        self._rate_limited_fields: set[str] = set()
+        self._time_listener: CALLBACK_TYPE | None = None
 
     async def update_method(self) -> TgeData | None:
-        return await self.hass.async_add_executor_job(self._update)
+        try:
+            data = await self.hass.async_add_executor_job(self._update)
+        except Exception:
+            # Cached data stays in use; retry soon instead of waiting for the next regular poll.
+            self.update_interval = RETRY_UPDATE_INTERVAL
+            raise
+        self.update_interval = DEFAULT_UPDATE_INTERVAL
+        if data is not None:
+            self._merge_data({day_data.date: day_data for day_data in data.data}, True)
+        return data
 
     def _update(self) -> TgeData:
-        now = datetime.datetime.now()
-        if self._should_update(now):
-            _LOGGER.debug("Updating TGE data")
-            self._last_update_hour = now.hour
-            self._last_data = self.connector.get_data()
+        _LOGGER.debug("Updating TGE data")
+        return self.connector.get_data()
+
+    @callback
+    def async_restore(self, cache: dict[datetime.date, TgeDayData]) -> None:
+        """Fill days missing in the coordinator with data restored by an entity."""
+        today = datetime.date.today()
+        if self._merge_data({k: v for (k, v) in cache.items() if k >= today}, False):
+            self.async_update_listeners()
+
+    def _merge_data(self, cache: dict[datetime.date, TgeDayData], overwrite: bool) -> bool:
+        changed = False
+        for date, day_data in cache.items():
+            if (overwrite or date not in self.stored_cache) and self.stored_cache.get(date) != day_data:
+                self.stored_cache[date] = day_data
+                changed = True
+        if self._remove_outdated_data(datetime.date.today()):
+            changed = True
+        if changed:
+            self._recalculate_fields(self.stored_cache, [*self._templates.keys()])
+        return changed
+
+    def has_current_data(self) -> bool:
+        slot_start = datetime.datetime.now().astimezone().replace(minute=0, second=0, microsecond=0)
+        day_data = self.cache.get(slot_start.date())
+        return day_data is not None and any(h.time == slot_start for h in day_data.hours)
+
+    def _remove_outdated_data(self, today: datetime.date) -> bool:
+        _LOGGER.debug("cleaning up: %s", self.stored_cache)
+        keys = [key for key in self.stored_cache.keys() if key < today]
+        for key in keys:
+            self.stored_cache.pop(key)
+            self.cache.pop(key, None)
+        if len(keys) > 0:
+            self.data_version += 1
+        return len(keys) > 0
+
+    def _recalculate_fields(self, base: dict[datetime.date, TgeDayData], fields: list[str]) -> None:
+        hours = {date: base.get(date, day_data).hours for (date, day_data) in self.stored_cache.items()}
+        for field in fields:
+            # Every hour is rendered with its own variables, so together they use all entities the template may read.
+            self._template_dependencies[field] = TrackStates(False, set(), set())
+            try:
+                values = {date: [self._calculate_template(h, field) for h in day_data.hours]
+                          for (date, day_data) in self.stored_cache.items()}
+            except TemplateError as e:
+                _LOGGER.error("Failed to calculate template of %s: %s", field, e)
+                continue
+            for date, date_values in values.items():
+                hours[date] = [dataclasses.replace(h, **{field: v}) for (h, v) in zip(hours[date], date_values)]
+        cache = {date: TgeDayData(date, date_hours) for (date, date_hours) in hours.items()}
+        if cache != self.cache:
+            self.cache = cache
+            self.data_version += 1
+        self._update_template_listener()
+
+    def _calculate_template(self, data: TgeHourData, field: str) -> float:
+        render_info = self._templates[field].async_render_to_info(self._get_template_variables(data))
+        dependencies = self._template_dependencies[field]
+        self._template_dependencies[field] = TrackStates(dependencies.all_states or render_info.all_states,
+                                                         dependencies.entities | render_info.entities,
+                                                         dependencies.domains | render_info.domains)
+        return render_info.result()
+
+    @staticmethod
+    def _get_template_variables(data: TgeHourData) -> dict:
+        now_func = lambda: data.time
+        return {
+            PARAMETER_FIXING_1_RATE: data.fixing1_rate,
+            PARAMETER_FIXING_1_VOLUME: data.fixing1_volume,
+            PARAMETER_FIXING_2_RATE: data.fixing2_rate,
+            PARAMETER_FIXING_2_VOLUME: data.fixing2_volume,
+            "now": now_func
+        }
+
+    @callback
+    def async_start_listeners(self) -> None:
+        self._time_listener = async_track_time_change(self.hass, self._handle_time_change, minute=0, second=0)
+        self._template_tracking = True
+        self._update_template_listener()
+
+    @callback
+    def async_stop_listeners(self) -> None:
+        self._template_tracking = False
+        if self._time_listener is not None:
+            self._time_listener()
+            self._time_listener = None
+        if self._rate_limit_listener is not None:
+            self._rate_limit_listener()
+            self._rate_limit_listener = None
+        if self._template_listener is not None:
+            self._template_listener.async_remove()
+            self._template_listener = None
+
+    @callback
+    def _handle_time_change(self, now: datetime.datetime) -> None:
+        self._remove_outdated_data(now.date())
+        self.async_update_listeners()
+
+    def _update_template_listener(self) -> None:
+        if not self._template_tracking:
+            return
+        dependencies = self._template_dependencies.values()
+        track_states = TrackStates(any(d.all_states for d in dependencies),
+                                   set().union(*(d.entities for d in dependencies)),
+                                   set().union(*(d.domains for d in dependencies)))
+        if self._template_listener is not None:
+            self._template_listener.async_update_listeners(track_states)
+        elif track_states.all_states or len(track_states.entities) > 0 or len(track_states.domains) > 0:
+            self._template_listener = async_track_state_change_filtered(self.hass, track_states,
+                                                                        self._handle_template_dependency_update)
+
+    @callback
+    def _handle_template_dependency_update(self, event: Event[EventStateChangedData]) -> None:
+        entity_id = event.data["entity_id"]
+        domain = split_entity_id(entity_id)[0]
+        fields = [field for (field, dependencies) in self._template_dependencies.items()
+                  if entity_id in dependencies.entities]
+        rate_limited_fields = {field for (field, dependencies) in self._template_dependencies.items()
+                               if field not in fields and (dependencies.all_states or domain in dependencies.domains)}
+        if self._rate_limit_listener is None and len(rate_limited_fields) > 0:
+            fields.extend(rate_limited_fields)
+            self._rate_limit_listener = async_call_later(self.hass, TEMPLATE_RATE_LIMIT, self._handle_rate_limit_end)
         else:
-            _LOGGER.debug("Using cached TGE data")
-        return self._last_data
-
-    def _should_update(self, now: datetime.datetime) -> bool:
-        return (
-                self._last_update_hour is None
-                or now.hour != self._last_update_hour
-                or self._last_data is None
-        )
+            self._rate_limited_fields |= rate_limited_fields
+        if len(fields) == 0:
+            return
+        _LOGGER.debug("Recalculating templates of %s after change of %s", fields, entity_id)
+        self._recalculate_fields(self.cache, fields)
+        self.async_update_listeners()
+
+    @callback
+    def _handle_rate_limit_end(self, _now: datetime.datetime) -> None:
+        # Changes matched only by domain or all states are rendered at most once per rate limit period.
+        self._rate_limit_listener = None
+        fields = [*self._rate_limited_fields]
+        self._rate_limited_fields.clear()
+        if len(fields) == 0:
+            return
+        self._rate_limit_listener = async_call_later(self.hass, TEMPLATE_RATE_LIMIT, self._handle_rate_limit_end)
+        _LOGGER.debug("Recalculating rate limited templates of %s", fields)
+        self._recalculate_fields(self.cache, fields)
+        self.async_update_listeners()
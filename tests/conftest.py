@@ -0,0 +1,15 @@
+"""Load modules of the integration that don't depend on Home Assistant.
+
+The package is registered as `tge` without running its `__init__`, which imports Home Assistant.
+"""
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+PACKAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "custom_components", "tge"))
+
+if "tge" not in sys.modules:
+    _package = importlib.util.module_from_spec(importlib.machinery.ModuleSpec("tge", None, is_package=True))
+    _package.__path__ = [PACKAGE_DIR]
+    sys.modules["tge"] = _package
@@ -0,0 +1,55 @@
+import datetime
+import json
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from tge.attributes import UNRECORDED_ATTRIBUTES, get_series_attributes  # noqa: E402
+from tge.connector import TgeHourData  # noqa: E402
+from tge.const import ATTRIBUTE_PRICES, ATTRIBUTE_VOLUMES, ATTRIBUTE_PARAMETER_PRICE, \
+    ATTRIBUTE_PARAMETER_VOLUME  # noqa: E402
+
+TODAY = datetime.date(2024, 3, 12)
+
+
+def _hours() -> list[TgeHourData]:
+    start = datetime.datetime.combine(TODAY, datetime.time(), ZoneInfo("Europe/Warsaw"))
+    return [TgeHourData(start + datetime.timedelta(hours=i), 400 + i * 7.31, 1000 + i * 13.7, 410 + i * 6.93,
+                        900 + i * 11.3) for i in range(48)]
+
+
+def _serialized_size(attributes: dict) -> int:
+    # Same compact form as the recorder uses for state attributes.
+    return len(json.dumps(attributes, default=lambda o: o.isoformat(), separators=(",", ":")).encode())
+
+
+def _attributes(attribute_name: str, parameter_name: str, field: str) -> dict:
+    output = {
+        "state_class": "measurement",
+        "unit_of_measurement": "zł/MWh",
+        "icon": "mdi:cash",
+        "friendly_name": "TGE Fixing 1 Rate",
+    }
+    output.update(get_series_attributes(_hours(), attribute_name, parameter_name, lambda h: getattr(h, field), TODAY))
+    return output
+
+
+def test_unrecorded_attributes_match_produced_names():
+    prices = _attributes(ATTRIBUTE_PRICES, ATTRIBUTE_PARAMETER_PRICE, "fixing1_rate")
+    volumes = _attributes(ATTRIBUTE_VOLUMES, ATTRIBUTE_PARAMETER_VOLUME, "fixing1_volume")
+    series = (prices.keys() | volumes.keys()) - {"state_class", "unit_of_measurement", "icon", "friendly_name"}
+    assert series == UNRECORDED_ATTRIBUTES
+    assert len(prices[ATTRIBUTE_PRICES]) == 48
+    assert len(prices[f"{ATTRIBUTE_PRICES}_today"]) == 24
+    assert len(prices[f"{ATTRIBUTE_PRICES}_tomorrow"]) == 24
+
+
+def test_recorded_size_of_48_hours():
+    attributes = _attributes(ATTRIBUTE_PRICES, ATTRIBUTE_PARAMETER_PRICE, "fixing1_rate")
+    recorded = {k: v for (k, v) in attributes.items() if k not in UNRECORDED_ATTRIBUTES}
+    full_size = _serialized_size(attributes)
+    recorded_size = _serialized_size(recorded)
+    assert recorded_size * 20 < full_size
@@ -0,0 +1,74 @@
+import csv
+import datetime
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from conftest import PACKAGE_DIR  # noqa: E402
+from tge import cli  # noqa: E402
+from tge.connector import TgeConnector, TgeDayData, TgeHourData  # noqa: E402
+
+
+def _day(date: datetime.date) -> TgeDayData:
+    return TgeDayData(date, [
+        TgeHourData(TgeConnector._get_time_of_row(date, hour, 0), 100.0 + hour, 1.0, 200.0 + hour, 2.0)
+        for hour in range(24)
+    ])
+
+
+@pytest.fixture
+def fake_download(monkeypatch):
+    monkeypatch.setattr(TgeConnector, "get_data_for_date", staticmethod(_day))
+
+
+def test_cli_runs_without_home_assistant():
+    code = (
+        "import runpy, sys\n"
+        "sys.modules['homeassistant'] = None\n"
+        "sys.argv = ['cli.py', '--help']\n"
+        f"runpy.run_path({os.path.join(PACKAGE_DIR, 'cli.py')!r}, run_name='__main__')\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Export TGE fixing history" in result.stdout
+
+
+def test_export_csv(tmp_path, fake_download):
+    output = str(tmp_path / "out.csv")
+    rows = cli.export(datetime.date(2024, 1, 1), datetime.date(2024, 1, 3), output, cli.FORMAT_CSV, concurrency=2)
+    assert rows == 72
+    with open(output, encoding="utf-8") as file:
+        data = list(csv.DictReader(file))
+    assert len(data) == 72
+    assert data[0]["time"] == "2024-01-01T00:00:00+01:00"
+    assert data[-1]["time"] == "2024-01-03T23:00:00+01:00"
+
+
+def test_resume_drops_rows_written_after_last_progress(tmp_path, fake_download):
+    output = str(tmp_path / "out.jsonl")
+    cli.export(datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), output, cli.FORMAT_JSONL)
+    with open(output, "a", encoding="utf-8") as file:
+        file.write('{"time": "2024-01-03T00:00:00+01:00"}\n{"time": "2024-01-03T01:0')
+
+    rows = cli.export(datetime.date(2024, 1, 1), datetime.date(2024, 1, 4), output, cli.FORMAT_JSONL, resume=True)
+
+    assert rows == 48
+    with open(output, encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert len(lines) == 96
+    assert len(set(lines)) == 96
+    assert cli.read_progress(output + cli.PROGRESS_SUFFIX) == (datetime.date(2024, 1, 4), os.path.getsize(output))
+
+
+def test_parquet_buffers_rows_into_row_groups(tmp_path, fake_download):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    output = str(tmp_path / "out.parquet")
+    cli.export(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31), output, cli.FORMAT_PARQUET)
+    metadata = pyarrow_parquet.ParquetFile(output).metadata
+    assert metadata.num_rows == 31 * 24
+    assert metadata.num_row_groups == 1
@@ -0,0 +1,96 @@
+import datetime
+import gzip
+import io
+import os
+import tracemalloc
+
+import pytest
+
+requests = pytest.importorskip("requests")
+bs4 = pytest.importorskip("bs4")
+urllib3 = pytest.importorskip("urllib3")
+
+from tge.connector import TgeConnector, TgeStreamScanner  # noqa: E402
+
+
+def _timetable(labels: list[str]) -> str:
+    rows = "".join(f"<tr><td>{label}</td><td>1,5</td><td>2</td><td>3</td><td>4</td></tr>" for label in labels)
+    return f'<table id="footable_kontrakty_godzinowe"><tbody>{rows}</tbody></table>'
+
+
+def _parse(date: datetime.date, labels: list[str]):
+    return TgeConnector._parse_timetable(bs4.BeautifulSoup(_timetable(labels), "html.parser"), date)
+
+
+def test_times_use_offset_of_date_of_data():
+    winter = _parse(datetime.date(2024, 1, 15), ["0-1", "13-14"])
+    summer = _parse(datetime.date(2024, 7, 15), ["0-1"])
+    assert winter[0].time.isoformat() == "2024-01-15T00:00:00+01:00"
+    assert winter[1].time.isoformat() == "2024-01-15T13:00:00+01:00"
+    assert summer[0].time.isoformat() == "2024-07-15T00:00:00+02:00"
+    assert winter[0].fixing1_rate == 1.5
+
+
+def test_repeated_hour_at_end_of_dst_gets_distinct_times():
+    labels = ["0-1", "1-2", "2-3", "2-3", "3-4"]
+    hours = _parse(datetime.date(2024, 10, 27), labels)
+    utc_times = [h.time.astimezone(datetime.timezone.utc) for h in hours]
+    assert len(set(utc_times)) == len(labels)
+    assert utc_times == sorted(utc_times)
+    assert [h.time.isoformat() for h in hours[2:4]] == ["2024-10-27T02:00:00+02:00", "2024-10-27T02:00:00+01:00"]
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "rdn.html")
+FIXTURE_DATE = datetime.date(2024, 1, 2)
+
+
+def _response() -> requests.Response:
+    with open(FIXTURE, "rb") as file:
+        body = gzip.compress(file.read())
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response.raw = urllib3.HTTPResponse(body=io.BytesIO(body), headers={"Content-Encoding": "gzip"},
+                                        preload_content=False, decode_content=True)
+    return response
+
+
+def _full_download(response: requests.Response):
+    return TgeConnector._parse_page(response.text, FIXTURE_DATE)
+
+
+def _streaming_download(response: requests.Response):
+    return TgeConnector._parse_page(TgeConnector._read_until_timetable(response), FIXTURE_DATE)
+
+
+def _measure(download) -> tuple[object, int, int]:
+    response = _response()
+    tracemalloc.start()
+    result = download(response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, response.raw.tell(), peak
+
+
+def test_scanner_detects_end_of_hourly_table_for_any_chunking():
+    with open(FIXTURE, encoding="utf-8") as file:
+        page = file.read()
+    end_of_table = page.index("</table>", page.index('id="footable_kontrakty_godzinowe"')) + len("</table>")
+    for chunk_size in [1, 7, 1024, len(page)]:
+        scanner = TgeStreamScanner()
+        position = 0
+        while not scanner.done and position < len(page):
+            scanner.feed(page[position:position + chunk_size])
+            position += chunk_size
+        assert scanner.date_found
+        assert scanner.table_complete
+        assert end_of_table <= position < end_of_table + chunk_size
+
+
+def test_streaming_download_parses_same_data_with_fewer_bytes_and_less_memory():
+    full, full_bytes, full_peak = _measure(_full_download)
+    streamed, streamed_bytes, streamed_peak = _measure(_streaming_download)
+    assert streamed == full
+    assert len(streamed.hours) == 24
+    assert streamed_bytes < full_bytes
+    assert streamed_peak < full_peak
@@ -0,0 +1,88 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from tge.cost import TgeCostAccumulator, get_day_start, get_hour_start
+
+TIMEZONE = ZoneInfo("Europe/Warsaw")
+PRICES = {hour: 100 + hour * 10 for hour in range(24)}
+
+
+def _time(day: int, hour: int, minute: int = 0) -> datetime.datetime:
+    return datetime.datetime(2024, 3, day, hour, minute, tzinfo=TIMEZONE)
+
+
+def _get_price(when: datetime.datetime) -> float | None:
+    return PRICES.get(when.hour)
+
+
+def _accumulator(period_start: datetime.datetime) -> TgeCostAccumulator:
+    accumulator = TgeCostAccumulator()
+    accumulator.reset_period(period_start)
+    return accumulator
+
+
+def test_first_reading_is_only_stored():
+    accumulator = _accumulator(_time(12, 10))
+    accumulator.add_reading(5, _time(12, 10, 30), _get_price)
+    assert accumulator.total_cost == 0
+    assert accumulator.last_energy == 5
+    assert accumulator.last_update == _time(12, 10, 30)
+
+
+def test_delta_is_split_at_slot_boundaries():
+    accumulator = _accumulator(_time(12, 0))
+    accumulator.add_reading(0, _time(12, 10, 30), _get_price)
+    accumulator.add_reading(1, _time(12, 11, 30), _get_price)
+    assert accumulator.total_cost == pytest.approx(0.5 * 200 + 0.5 * 210)
+    accumulator.add_reading(4, _time(12, 14, 30), _get_price)
+    assert accumulator.total_cost == pytest.approx(205 + 0.5 * 210 + 220 + 230 + 0.5 * 240)
+
+
+def test_meter_reset_and_stale_readings_add_no_cost():
+    accumulator = _accumulator(_time(12, 0))
+    accumulator.add_reading(10, _time(12, 10), _get_price)
+    accumulator.add_reading(2, _time(12, 10, 30), _get_price)
+    accumulator.add_reading(3, _time(12, 10, 30), _get_price)
+    assert accumulator.total_cost == 0
+    assert accumulator.last_energy == 3
+    accumulator.add_reading(4, _time(12, 11), _get_price)
+    assert accumulator.total_cost == pytest.approx(200)
+
+
+def test_slots_without_price_are_skipped():
+    accumulator = _accumulator(_time(12, 0))
+    accumulator.add_reading(0, _time(12, 10, 30), _get_price)
+    accumulator.add_reading(1, _time(12, 11, 30), lambda when: 200 if when.hour == 10 else None)
+    assert accumulator.total_cost == pytest.approx(100)
+
+
+def test_hourly_periods_add_up_to_daily_period():
+    # Periods are closed at the boundary, before the first reading after it arrives.
+    hourly = _accumulator(get_hour_start(_time(12, 22, 0)))
+    daily = _accumulator(get_day_start(_time(12, 22, 0)))
+    hourly_totals = []
+    daily_totals = []
+    readings = [(_time(12, 22, 0) + datetime.timedelta(minutes=25 * i), 0.3 * i) for i in range(12)]
+    for now, energy in readings:
+        if get_hour_start(now) != hourly.period_start:
+            hourly_totals.append(hourly.total_cost)
+            hourly.reset_period(get_hour_start(now))
+        if get_day_start(now) != daily.period_start:
+            daily_totals.append(daily.total_cost)
+            daily.reset_period(get_day_start(now))
+        hourly.add_reading(energy, now, _get_price)
+        daily.add_reading(energy, now, _get_price)
+    hourly_totals.append(hourly.total_cost)
+    daily_totals.append(daily.total_cost)
+    assert sum(hourly_totals) == pytest.approx(sum(daily_totals))
+    assert sum(daily_totals) == pytest.approx(
+        0.3 * 11 / (11 * 25) * sum(PRICES[(22 + m // 60) % 24] for m in range(11 * 25)))
+
+
+def test_accumulator_round_trip():
+    accumulator = TgeCostAccumulator(12.5, _time(12, 10), 3.25, _time(12, 10, 45))
+    assert TgeCostAccumulator.from_dict(accumulator.as_dict()) == accumulator
+    assert TgeCostAccumulator.from_dict(TgeCostAccumulator().as_dict()) == TgeCostAccumulator()
+    assert TgeCostAccumulator.from_dict({}) == TgeCostAccumulator()
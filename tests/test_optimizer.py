@@ -0,0 +1,39 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from tge.attributes import convert_price  # noqa: E402
+from tge.connector import TgeHourData  # noqa: E402
+from tge.const import UNIT_GR_KWH  # noqa: E402
+from tge.optimizer import TgeBatteryOptimizer, TgeBatteryParameters  # noqa: E402
+
+OPTIONS = {
+    "battery_capacity": 10,
+    "battery_charge_power": 5,
+    "battery_discharge_power": 5,
+    "battery_efficiency": 100,
+    "battery_initial_soc": 50,
+}
+
+
+def test_parameters_prefer_overrides_then_sensor_then_options():
+    assert TgeBatteryParameters.from_options(OPTIONS, {}).initial_energy == 5
+    assert TgeBatteryParameters.from_options(OPTIONS, {}, 20).initial_energy == 2
+    parameters = TgeBatteryParameters.from_options(OPTIONS, {"initial_soc": 100, "capacity": 4}, 20)
+    assert parameters.capacity == 4
+    assert parameters.initial_energy == 4
+    assert parameters.efficiency == 1
+
+
+def test_schedule_prices_are_converted_to_configured_unit():
+    start = datetime.datetime(2024, 3, 12, tzinfo=ZoneInfo("Europe/Warsaw"))
+    hours = [TgeHourData(start + datetime.timedelta(hours=i), price, 0, 0, 0) for (i, price) in
+             enumerate([200, 800])]
+    parameters = TgeBatteryParameters.from_options(OPTIONS, {"initial_soc": 0})
+    schedule = TgeBatteryOptimizer.optimize(hours, parameters).to_dict(lambda p: convert_price(p, UNIT_GR_KWH))
+    assert [s["price"] for s in schedule["schedule"]] == [20, 80]
+    assert [s["action"] for s in schedule["schedule"]] == ["charge", "discharge"]